@@ -1,82 +1,178 @@
 import os
-import json
+import gzip
+import mmap
+import hashlib
 import logging
-from datetime import datetime
-from flask import Flask, jsonify
+import threading
+from operator import attrgetter
+from typing import NamedTuple
+import brotli
+import msgspec
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 import vet # The Scraper
 
+class MsgspecJSONProvider(DefaultJSONProvider):
+    """Routes jsonify() through msgspec's C encoder instead of stdlib json."""
+    def dumps(self, obj, **kwargs):
+        return msgspec.json.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return msgspec.json.decode(s)
+
 app = Flask(__name__)
+app.json = MsgspecJSONProvider(app)
 # Enable CORS for production - allows UI to connect from any domain
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 DATA_CACHE_FILE = 'Day1.json'
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+# Decoding straight into Structs skips the intermediate dict-of-dicts json.load builds
+cache_decoder = msgspec.json.Decoder(dict[str, vet.Fixture])
+
+class CachedResponse(NamedTuple):
+    """Everything GET '/' needs, built together so readers never mix two refreshes."""
+    body: bytes
+    etag: str
+    # Compressed once per refresh so requests never pay compression CPU
+    gz: bytes
+    br: bytes
+    mtime_ns: int
+
+# Prebuilt body for GET '/': Day1.json only changes once per refresh, so the
+# transform/sort/encode work is done there instead of on every request.
+# Replaced wholesale by a single assignment, which is atomic, so readers need no lock.
+_CACHED_RESPONSE = CachedResponse(b"", "", b"", b"", 0)
+# (mtime_ns, error) of the last Day1.json that failed to build; skipped until the file changes
+_REFRESH_FAILURE = (0, "")
+# Serializes rebuilds only, so concurrent requests after a change don't each redo the work
+_refresh_lock = threading.Lock()
+
+def build_fixtures_payload():
+    """
+    Transforms the Object Map from Day1.json into a sorted Array for the UI.
+    Includes lineups, standings, and all stream links.
+    """
+    # msgspec decodes straight from the mapped pages, skipping the f.read() copy
+    with open(DATA_CACHE_FILE, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data_map = cache_decoder.decode(mm)
+    
+    output_list = []
+    for event_id, item in data_map.items():
+        # Caches written before vet.py persisted event_id only carry it as the key
+        if not item.event_id:
+            item.event_id = event_id
+        output_list.append(item)
+    
+    # PRODUCTION SORTING: 
+    # 1. Live matches at the top.
+    # 2. Upcoming matches sorted by time.
+    # Two stable passes with C-level attrgetter keys instead of a tuple-building lambda.
+    output_list.sort(key=attrgetter('parsed_datetime'))
+    output_list.sort(key=attrgetter('is_live'), reverse=True)
+    
+    return msgspec.json.encode(output_list)
+
+def refresh_response_cache():
+    """
+    Rebuilds the cached '/' body, its ETag and its compressed variants from Day1.json.
+    Keyed on the file's mtime, so calling it when nothing changed costs a single stat.
+    """
+    global _CACHED_RESPONSE, _REFRESH_FAILURE
+    mtime_ns = os.stat(DATA_CACHE_FILE).st_mtime_ns
+    if mtime_ns in (_CACHED_RESPONSE.mtime_ns, _REFRESH_FAILURE[0]):
+        return
+    with _refresh_lock:
+        # Another thread may have built (or failed on) this file while we waited
+        mtime_ns = os.stat(DATA_CACHE_FILE).st_mtime_ns
+        if mtime_ns in (_CACHED_RESPONSE.mtime_ns, _REFRESH_FAILURE[0]):
+            return
+        try:
+            body = build_fixtures_payload()
+        except Exception as e:
+            _REFRESH_FAILURE = (mtime_ns, str(e))
+            raise
+        _CACHED_RESPONSE = CachedResponse(
+            body=body,
+            etag=hashlib.md5(body).hexdigest(),
+            gz=gzip.compress(body, compresslevel=9),
+            br=brotli.compress(body, quality=11),
+            mtime_ns=mtime_ns
+        )
+        _REFRESH_FAILURE = (0, "")
+
 def scheduled_scrape():
     """Triggered by the background scheduler every 30 mins."""
-    logger.info(f"--- BEGINNING DATA REFRESH: {datetime.now()} ---")
+    logger.info("--- BEGINNING DATA REFRESH ---")
     try:
         # This calls the run function in your vet.py
         vet.run_scraper_and_get_data()
+        refresh_response_cache()
         logger.info("--- REFRESH SUCCESSFUL ---")
     except Exception as e:
-        logger.error(f"SCRAPE ERROR: {e}")
+        logger.error("SCRAPE ERROR: %s", e)
 
 @app.route('/', methods=['GET'])
 def get_full_fixtures():
-    """
-    Transforms the Object Map from Day1.json into a sorted Array for the UI.
-    Includes lineups, standings, and all stream links.
-    """
-    if not os.path.exists(DATA_CACHE_FILE):
+    """Serves the prebuilt fixtures array, answering 304 when the client's copy is current."""
+    try:
+        # Picks up a Day1.json written outside the scheduler (or present at boot)
+        refresh_response_cache()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error("API RUNTIME ERROR: %s", e)
+
+    # Read the snapshot once; a concurrent refresh swaps in a new one without tearing this one
+    cached = _CACHED_RESPONSE
+    if not cached.body:
+        failed_error = _REFRESH_FAILURE[1]
+        if failed_error:
+            return jsonify({"error": "Failed to parse data", "details": failed_error}), 500
         return jsonify({"error": "Initializing", "message": "Scraper is fetching initial data..."}), 503
 
-    try:
-        with open(DATA_CACHE_FILE, 'r', encoding='utf-8') as f:
-            data_map = json.load(f)
-        
-        output_list = []
-        for event_id, item in data_map.items():
-            # EXTRACTING DEEP DATA POINTS
-            output_list.append({
-                "event_id": event_id,
-                "competition": item.get("competition", "Other"),
-                "matchup": item.get("matchup", "Unknown Match"),
-                "date_time": item.get("date_time", ""),
-                "parsed_datetime": item.get("parsed_datetime", "9999-12-31"), # Fallback for sort
-                "is_live": item.get("is_live", False),
-                "team_logos": item.get("team_logos", []),
-                "streams": item.get("streams", []),
-                "starting_lineups": item.get("starting_lineups", {"home_team": [], "away_team": []}),
-                "league_table": item.get("league_table", []),
-                "event_url": item.get("event_url", "#"),
-                "last_updated": item.get("last_updated", "")
-            })
-        
-        # PRODUCTION SORTING: 
-        # 1. Live matches at the top.
-        # 2. Upcoming matches sorted by time.
-        output_list.sort(key=lambda x: (not x['is_live'], x['parsed_datetime']))
-        
-        return jsonify(output_list)
+    body, etag, encoding = cached.body, cached.etag, None
+    if request.accept_encodings['br']:
+        body, encoding = cached.br, 'br'
+    elif request.accept_encodings['gzip']:
+        body, encoding = cached.gz, 'gzip'
 
-    except Exception as e:
-        logger.error(f"API RUNTIME ERROR: {e}")
-        return jsonify({"error": "Failed to parse data", "details": str(e)}), 500
+    # Prebuilt bytes: let werkzeug hand them to the server without re-wrapping
+    response = Response(body, mimetype='application/json', direct_passthrough=True)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.content_encoding = encoding
+        # Each encoding is a distinct representation and needs its own validator
+        etag = f"{etag}-{encoding}"
+    response.set_etag(etag)
+    # Data only moves every 30 mins, so browsers/CDNs can answer most requests themselves
+    response.last_modified = cached.mtime_ns // 1_000_000_000
+    response.headers['Cache-Control'] = 'public, max-age=1800, stale-while-revalidate=600'
+    return response.make_conditional(request)
 
 # --- Production Scheduler Logic ---
-scheduler = BackgroundScheduler()
+# One worker thread and max_instances=1: a scrape that overruns the interval is
+# coalesced into a single catch-up run instead of overlapping the next one.
+scheduler = BackgroundScheduler(
+    executors={'default': ThreadPoolExecutor(1)},
+    job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 300}
+)
 
 # Prevents the scheduler from running twice in Flask's 'Reload' mode
 if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-    # Populate data immediately on boot if missing
+    # Populate data immediately on boot if missing. Queued as a one-shot job rather
+    # than called inline so the worker can boot and answer 503 while it runs; the
+    # single-thread executor keeps it from overlapping the interval job.
     if not os.path.exists(DATA_CACHE_FILE):
-        scheduled_scrape()
+        scheduler.add_job(scheduled_scrape, 'date', id='initial_scrape')
     
-    scheduler.add_job(scheduled_scrape, 'interval', minutes=30, id='refresh_job')
+    # Jitter keeps the upstream fetches from landing on the exact same wall-clock beat
+    scheduler.add_job(scheduled_scrape, 'interval', minutes=30, jitter=60, id='refresh_job', replace_existing=True)
     scheduler.start()
     logger.info("✅ Scheduler Active: Refreshing every 30 minutes.")
 
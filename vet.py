@@ -1,24 +1,63 @@
 import requests
-from bs4 import BeautifulSoup
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import msgspec
 from datetime import datetime
 import urllib3
 import re
-from urllib.parse import urljoin
 import threading
 import os
-import tempfile
+import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Suppress SSL warnings for production stability
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = logging.getLogger(__name__)
+
+# The listing page is only ever searched for these tables; everything else is dropped during parsing
+FIXTURE_TABLE_ATTRS = {'cellpadding': '1', 'cellspacing': '2'}
+FIXTURE_TABLE_STRAINER = SoupStrainer('table', attrs=FIXTURE_TABLE_ATTRS)
+
+# Compiled once instead of going through re's pattern cache for every fixture row / event page
+EVENT_ID_RE = re.compile(r'/eventinfo/(\d+)')
+EVDESC_DATE_RE = re.compile(r'(\d+)\s+([A-Za-z]+)\s+at\s+(\d+:\d+)')
+LINEUP_HEADER_RE = re.compile(r'Starting Lineup', re.I)
+LEADING_DAY_RE = re.compile(r'^(\d+)\s+[A-Za-z]+')
+
+class Fixture(msgspec.Struct):
+    """
+    One Day1.json entry. A slotted struct rather than a dict per fixture; the defaults
+    are the API's fallbacks for fields missing from older cache files.
+    """
+    event_id: str = ""
+    competition: str = "Other"
+    matchup: str = "Unknown Match"
+    date_time: str = ""
+    parsed_datetime: str = "9999-12-31" # Fallback for sort
+    is_live: bool = False
+    team_logos: list = []
+    streams: list = []
+    starting_lineups: dict = msgspec.field(default_factory=lambda: {"home_team": [], "away_team": []})
+    league_table: list = []
+    event_url: str = "#"
+    last_updated: str = ""
+
 class BroadcastScraper:
     def __init__(self, base_url="https://livetv.sx", max_workers=10):
         self.base_url = base_url
         self.max_workers = max_workers
         self.session = requests.Session()
         self.session.verify = False 
+        # One pooled keep-alive connection per worker thread; the default pool of 10
+        # would otherwise discard connections whenever max_workers exceeds it.
+        # Transient 5xx answers are retried on the pooled connection rather than
+        # failing the fixture outright.
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -26,20 +65,57 @@ class BroadcastScraper:
         self.stats_lock = threading.Lock()
         self.successful_requests = 0
         self.failed_requests = 0
+        # url -> (etag, last_modified, content) for pages that sent a validator
+        self._validators = {}
+
+    def _fetch(self, url):
+        """GET that revalidates with If-None-Match/If-Modified-Since and replays the held body on 304."""
+        headers = {}
+        cached = self._validators.get(url)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag: headers['If-None-Match'] = etag
+            if last_modified: headers['If-Modified-Since'] = last_modified
+        
+        response = self.session.get(url, timeout=15, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[2]
+        response.raise_for_status()
+        
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._validators[url] = (etag, last_modified, response.content)
+        return response.content
+
+    def prune_validators(self, urls):
+        """Drops stored pages for URLs outside `urls`, so a long-lived scraper doesn't accumulate past events."""
+        for url in list(self._validators):
+            if url not in urls: del self._validators[url]
+
+    def _abs_url(self, url):
+        """Resolves livetv.sx's protocol-relative ('//cdn...') and root-relative ('/...') links."""
+        if url.startswith('//'): return 'https:' + url
+        if url.startswith('/'): return self.base_url + url
+        return url
 
-    def _parse_broadcast_item(self, table):
+    def _is_today(self, fixture_data, today_day):
+        datetime_obj = fixture_data.get('datetime_obj')
+        if datetime_obj:
+            return datetime_obj.day == today_day
+        if fixture_data.get('date_time'):
+            # Unparsed rows: "<day> <Month> ..." compares the day number, while
+            # time-only rows ("18:00 (League)") are today's (mostly live) events
+            m = LEADING_DAY_RE.match(fixture_data['date_time'])
+            return m is None or int(m.group(1)) == today_day
+        return False
+
+    def _parse_broadcast_item(self, table, now=None, today_only=False):
         fixture_data = {}
+        now = now or datetime.now()
         try:
             link_tag = table.find('a', class_='live') or table.find('a', class_='bottomgray')
             if not link_tag: return None
             
-            fixture_data['matchup'] = link_tag.get_text(strip=True)
-            stream_href = link_tag.get('href', '')
-            if stream_href:
-                fixture_data['event_url'] = self.base_url + stream_href if stream_href.startswith('/') else stream_href
-                match = re.search(r'/eventinfo/(\d+)', stream_href)
-                if match: fixture_data['event_id'] = match.group(1)
-            
             evdesc_span = table.find('span', class_='evdesc')
             if evdesc_span:
                 desc_parts = [p.strip() for p in evdesc_span.get_text('\n').split('\n') if p.strip()]
@@ -47,43 +123,56 @@ class BroadcastScraper:
                     fixture_data['date_time'] = desc_parts[0]
                     if len(desc_parts) >= 2: fixture_data['competition'] = desc_parts[1].strip('()')
                     try:
-                        month_pattern = r'(\d+)\s+([A-Za-z]+)\s+at\s+(\d+:\d+)'
-                        m = re.search(month_pattern, desc_parts[0])
+                        m = EVDESC_DATE_RE.search(desc_parts[0])
                         if m:
                             date_part = f"{m.group(1)} {m.group(2)} at {m.group(3)}"
-                            parsed_date = datetime.strptime(date_part, '%d %B at %H:%M').replace(year=datetime.now().year)
+                            parsed_date = datetime.strptime(date_part, '%d %B at %H:%M').replace(year=now.year)
                             fixture_data['parsed_datetime'] = parsed_date.isoformat()
                             fixture_data['datetime_obj'] = parsed_date
                     except: pass
             
-            img_tag = table.find('img', alt=True)
-            if img_tag: fixture_data['logo_alt'] = img_tag['alt']
-            live_img = table.find('img', src=lambda x: x and 'live.gif' in x)
-            fixture_data['is_live'] = live_img is not None
+            # The date is read first so rows from other days bail out before the
+            # matchup text, event id and image walk below are extracted.
+            if today_only and not self._is_today(fixture_data, now.day): return None
+            # The datetime is only needed for that check; drop it so fixtures stay plain JSON data
+            fixture_data.pop('datetime_obj', None)
+            
+            fixture_data['matchup'] = link_tag.get_text(strip=True)
+            stream_href = link_tag.get('href', '')
+            if stream_href:
+                fixture_data['event_url'] = self._abs_url(stream_href)
+                match = EVENT_ID_RE.search(stream_href)
+                if match: fixture_data['event_id'] = match.group(1)
+            
+            # One walk over the row's images picks up both the logo alt text and the live marker
+            fixture_data['is_live'] = False
+            for img in table.find_all('img'):
+                if 'logo_alt' not in fixture_data and img.get('alt') is not None:
+                    fixture_data['logo_alt'] = img['alt']
+                if 'live.gif' in img.get('src', ''):
+                    fixture_data['is_live'] = True
+                if fixture_data['is_live'] and 'logo_alt' in fixture_data: break
             return fixture_data
         except: return None
 
     def get_fixtures_for_sport(self, sport_url):
         today_fixtures = []
+        seen_ids = set()
         try:
-            response = self.session.get(sport_url, timeout=15)
-            response.raise_for_status()
+            content = self._fetch(sport_url)
             with self.stats_lock: self.successful_requests += 1
-            soup = BeautifulSoup(response.content, 'html.parser')
-            today_day = datetime.now().day
-            fixture_tables = soup.find_all('table', {'cellpadding': '1', 'cellspacing': '2'})
+            soup = BeautifulSoup(content, 'lxml', parse_only=FIXTURE_TABLE_STRAINER)
+            # One clock read per page, shared with every row's date parse
+            now = datetime.now()
+            fixture_tables = soup.find_all('table', FIXTURE_TABLE_ATTRS)
             
             for table in fixture_tables:
-                fixture = self._parse_broadcast_item(table)
+                fixture = self._parse_broadcast_item(table, now, today_only=True)
                 if fixture:
-                    is_today = False
-                    if fixture.get('datetime_obj'):
-                        if fixture['datetime_obj'].day == today_day: is_today = True
-                    elif fixture.get('date_time'):
-                        if str(today_day) in fixture['date_time']: is_today = True
-                    
-                    if is_today and not any(f.get('event_id') == fixture.get('event_id') for f in today_fixtures if f.get('event_id')):
-                        today_fixtures.append(fixture)
+                    event_id = fixture.get('event_id')
+                    if not event_id or event_id in seen_ids: continue
+                    seen_ids.add(event_id)
+                    today_fixtures.append(fixture)
             return today_fixtures
         except:
             with self.stats_lock: self.failed_requests += 1
@@ -92,7 +181,7 @@ class BroadcastScraper:
     def _extract_lineups(self, soup):
         lineups = {"home_team": [], "away_team": []}
         try:
-            lineup_header = soup.find('span', string=re.compile(r'Starting Lineup', re.I))
+            lineup_header = soup.find('span', string=LINEUP_HEADER_RE)
             if lineup_header:
                 row = lineup_header.find_parent('tr').find_next_sibling('tr')
                 cells = row.find_all('td', class_='small', limit=2)
@@ -134,13 +223,13 @@ class BroadcastScraper:
             if flag_img:
                 src = flag_img.get('src', '')
                 stream_data['language'] = flag_img.get('title', '')
-                stream_data['flag_src'] = 'https:' + src if src.startswith('//') else src
+                stream_data['flag_src'] = self._abs_url(src)
             
             stream_data['bitrate'] = cells[1].get('title', '')
             play_link = cells[5].find('a')
             if play_link:
                 href = play_link.get('href', '')
-                stream_data['stream_url'] = urljoin(self.base_url, href) if href.startswith('/') else href
+                stream_data['stream_url'] = self._abs_url(href)
                 stream_data['stream_title'] = play_link.get('title', '')
             
             type_cell = cells[6]
@@ -150,10 +239,9 @@ class BroadcastScraper:
 
     def get_event_details_concurrent(self, event_url):
         try:
-            response = self.session.get(event_url, timeout=15)
-            response.raise_for_status()
+            content = self._fetch(event_url)
             with self.stats_lock: self.successful_requests += 1
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(content, 'lxml')
             
             event_data = {
                 'team_logos': [],
@@ -167,7 +255,7 @@ class BroadcastScraper:
                 src = img.get('src', '')
                 event_data['team_logos'].append({
                     'team_name': img.get('alt', '').strip(),
-                    'logo_url': urljoin(self.base_url, src) if src.startswith('/') else src
+                    'logo_url': self._abs_url(src)
                 })
             
             links_block = soup.find('div', id='links_block')
@@ -190,14 +278,20 @@ class BroadcastScraper:
                 fixture.update(details)
         return fixture
 
+# Reused across runs so pooled keep-alive connections, TLS sessions and the
+# conditional-GET validators survive between scheduled refreshes. Runs never
+# overlap (the API's scheduler allows one instance), so sharing it is safe.
+_SCRAPER = BroadcastScraper(max_workers=10)
+
 def run_scraper_and_get_data():
-    scraper = BroadcastScraper(max_workers=10) 
+    scraper = _SCRAPER
     sport_url = "https://livetv.sx/enx/allupcomingsports/1/"
     
     today_fixtures = scraper.get_fixtures_for_sport(sport_url)
     if not today_fixtures:
-        print("No fixtures found for today.")
+        logger.info("No fixtures found for today.")
         return {}
+    scraper.prune_validators({sport_url, *(f.get('event_url') for f in today_fixtures)})
     
     final_data_map = {}
     with ThreadPoolExecutor(max_workers=scraper.max_workers) as executor:
@@ -208,36 +302,38 @@ def run_scraper_and_get_data():
                 event_id = item.get('event_id')
                 if not event_id: continue
                 
-                # Cleanup internal objects before JSON serialization
-                if 'datetime_obj' in item: del item['datetime_obj']
-                
-                final_data_map[event_id] = {
-                    "matchup": item.get("matchup", "Unknown Match"),
-                    "event_url": item.get("event_url", ""),
-                    "competition": item.get("competition", "General"),
-                    "date_time": item.get("date_time", ""),
-                    "parsed_datetime": item.get("parsed_datetime", ""),
-                    "is_live": item.get("is_live", False),
-                    "team_logos": item.get("team_logos", []),
-                    "streams": item.get("streams", []),
-                    "starting_lineups": item.get("starting_lineups", {"home_team": [], "away_team": []}),
-                    "league_table": item.get("league_table", []),
-                    "last_updated": datetime.now().isoformat()
-                }
+                final_data_map[event_id] = Fixture(
+                    event_id=event_id,
+                    matchup=item.get("matchup", "Unknown Match"),
+                    event_url=item.get("event_url", ""),
+                    competition=item.get("competition", "General"),
+                    date_time=item.get("date_time", ""),
+                    parsed_datetime=item.get("parsed_datetime", ""),
+                    is_live=item.get("is_live", False),
+                    team_logos=item.get("team_logos", []),
+                    streams=item.get("streams", []),
+                    starting_lineups=item.get("starting_lineups", {"home_team": [], "away_team": []}),
+                    league_table=item.get("league_table", []),
+                    last_updated=datetime.now().isoformat()
+                )
             except Exception as e:
-                print(f"Error processing item: {e}")
+                logger.error("Error processing item: %s", e)
 
     # Atomic Save to Day1.json
+    # Fixed sibling name: scheduler runs never overlap, so mkstemp's unique name buys nothing
+    tmp_path = "Day1.json.tmp"
     try:
-        tmp_fd, tmp_path = tempfile.mkstemp(dir=".", prefix="Day1.json.tmp")
-        with os.fdopen(tmp_fd, 'w', encoding='utf-8') as f:
-            json.dump(final_data_map, f, indent=4, ensure_ascii=False)
+        with open(tmp_path, 'wb') as f:
+            f.write(msgspec.json.encode(final_data_map))
         os.replace(tmp_path, "Day1.json")
-        print(f"✅ Day1.json updated: {len(final_data_map)} items at {datetime.now().strftime('%H:%M:%S')}")
+        logger.info("✅ Day1.json updated: %d items", len(final_data_map))
     except Exception as e:
-        print(f"❌ File Save Error: {e}")
+        logger.error("❌ File Save Error: %s", e)
+        try: os.remove(tmp_path)
+        except OSError: pass
         
     return final_data_map
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     run_scraper_and_get_data()